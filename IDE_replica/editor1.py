@@ -23,11 +23,30 @@
 
 from __future__ import annotations
 
+import codecs
+import errno
+import os
 import sys
+import tempfile
 import time
+from collections import OrderedDict
 from pathlib import Path
 
-from PySide6.QtCore import Qt, QRect, QSize, QRegularExpression, QModelIndex
+from PySide6.QtCore import (
+    Qt,
+    QEvent,
+    QRect,
+    QSize,
+    QRegularExpression,
+    QModelIndex,
+    QFile,
+    QIODevice,
+    QTimer,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    Signal,
+)
 from PySide6.QtGui import (
     QColor,
     QPainter,
@@ -40,6 +59,10 @@ from PySide6.QtGui import (
     QKeySequence,
     QFont,
     QPalette,
+    QTextCursor,
+    QPixmap,
+    QPen,
+    QTextDocument,
 )
 from PySide6.QtWidgets import (
     QApplication,
@@ -55,8 +78,23 @@ from PySide6.QtWidgets import (
     QFileSystemModel,
     QLabel,
     QTextEdit,
+    QPlainTextDocumentLayout,
 )
 
+# Files larger than this (in characters) are shown without syntax highlighting
+SYNTAX_MAX_BYTES = 500 * 1024
+PYTHON_SUFFIXES = {".py", ".pyw"}
+# Files bigger than this (bytes) are decoded and built in chunks from the event loop,
+# so the UI stays responsive and the whole text never sits in memory as one Python str
+PREVIEW_CHUNK_THRESHOLD = 1024 * 1024
+PREVIEW_CHUNK_SIZE = 64 * 1024
+# Recently previewed (small) files are kept decoded so browsing back and forth doesn't re-read them
+PREVIEW_CACHE_SIZE = 4
+# Read once at import: os.umask can only be read by setting it, which isn't thread-safe later
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
 # ------------------------------
 # Line number gutter
 # ------------------------------
@@ -73,6 +111,9 @@ class LineNumberArea(QWidget):
 
 
 class CodeEditor(QPlainTextEdit):
+    # (first, last) block numbers on screen, throttled while scrolling/editing
+    visibleBlocksChanged = Signal(int, int)
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -88,9 +129,33 @@ class CodeEditor(QPlainTextEdit):
         self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
 
         self._lineNumberArea = LineNumberArea(self)
+        self._digit_atlas: list[QPixmap] = []  # pre-rendered "0".."9", built on first paint
+        self._digit_w = self.fontMetrics().horizontalAdvance("9")
+        self._line_h = 0  # height of one unwrapped line; measured on first paint, reset on font change
+        self.refreshGutterColors()
+
+        # updateRequest can fire many times per frame; gutter repaints are merged into one
+        self._gutter_dirty_rect = QRect()
+        self._gutter_timer = QTimer(self)
+        self._gutter_timer.setSingleShot(True)
+        self._gutter_timer.setInterval(0)
+        self._gutter_timer.timeout.connect(self._flushGutter)
+
+        # the current-line highlight only changes when the cursor moves to another block,
+        # or when something it depends on (palette, read-only, document contents) changes
+        self._last_hl_block = -1
+        self._hl_dirty = True
+
+        self._visible_blocks = (-1, -1)
+        self._visible_timer = QTimer(self)
+        self._visible_timer.setSingleShot(True)
+        self._visible_timer.setInterval(50)
+        self._visible_timer.timeout.connect(self._emitVisibleBlocks)
 
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
+        self.blockCountChanged.connect(self._blockCountChanged)
         self.updateRequest.connect(self.updateLineNumberArea)
+        self.updateRequest.connect(self._scheduleVisibleBlocks)
         self.cursorPositionChanged.connect(self.highlightCurrentLine)
 
         self.updateLineNumberAreaWidth(0)
@@ -111,51 +176,170 @@ class CodeEditor(QPlainTextEdit):
 
     def updateLineNumberArea(self, rect, dy):
         if dy:
+            # scroll right away so the gutter stays aligned with the text
             self._lineNumberArea.scroll(0, dy)
         else:
-            self._lineNumberArea.update(0, rect.y(), self._lineNumberArea.width(), rect.height())
+            dirty = QRect(0, rect.y(), self._lineNumberArea.width(), rect.height())
+            self._gutter_dirty_rect = self._gutter_dirty_rect.united(dirty)
+            if not self._gutter_timer.isActive():
+                self._gutter_timer.start()
 
         if rect.contains(self.viewport().rect()):
             self.updateLineNumberAreaWidth(0)
 
+    def _flushGutter(self):
+        self._lineNumberArea.update(self._gutter_dirty_rect)
+        self._gutter_dirty_rect = QRect()
+
+    # --- visible range (drives viewport-limited highlighting) ---
+    def visibleBlockRange(self) -> tuple[int, int]:
+        first = self.firstVisibleBlock().blockNumber()
+        # one block per screen line at most, so this never under-counts (even when wrapping)
+        lines = self.viewport().height() // max(1, self._line_h or self.fontMetrics().height()) + 1
+        return first, first + lines
+
+    def _scheduleVisibleBlocks(self, _rect, _dy):
+        if not self._visible_timer.isActive():
+            self._visible_timer.start()
+
+    def _blockCountChanged(self, _count):
+        # lines were added/removed: other blocks may now sit at the same numbers, so
+        # report the range again even if the numbers on screen stay the same
+        self._visible_blocks = (-1, -1)
+        if not self._visible_timer.isActive():
+            self._visible_timer.start()
+
+    def _emitVisibleBlocks(self):
+        blocks = self.visibleBlockRange()
+        if blocks != self._visible_blocks:
+            self._visible_blocks = blocks
+            self.visibleBlocksChanged.emit(*blocks)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.FontChange:
+            self._digit_w = self.fontMetrics().horizontalAdvance("9")
+            self._line_h = 0
+            self._digit_atlas = []
+        elif event.type() == QEvent.Type.PaletteChange:
+            self._hl_dirty = True
+
+    def setReadOnly(self, ro: bool):
+        super().setReadOnly(ro)
+        self._hl_dirty = True
+        self.highlightCurrentLine()
+
+    # Whole-document resets move the selection's cursor (setPlainText leaves it at the end)
+    # or drop the selection (clear), even when the caret stays on the same block number
+    def setPlainText(self, text: str):
+        self._hl_dirty = True
+        super().setPlainText(text)
+        self.highlightCurrentLine()
+
+    def clear(self):
+        self._hl_dirty = True
+        super().clear()
+        self.highlightCurrentLine()
+
+    def setDocument(self, document):
+        super().setDocument(document)
+        self._hl_dirty = True  # the old selection's cursor belongs to the old document
+        # tab width is stored on the document, so a swapped-in one needs it again
+        self.setTabStopDistance(self.fontMetrics().horizontalAdvance(" ") * 4)
+        self.updateLineNumberAreaWidth(0)
+        self.highlightCurrentLine()
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         cr = self.contentsRect()
         self._lineNumberArea.setGeometry(QRect(cr.left(), cr.top(), self.lineNumberAreaWidth(), cr.height()))
 
+    def refreshGutterColors(self):
+        # Gutter colours only change with the theme: resolve them here, not on every paint
+        if QApplication.instance().palette().color(QPalette.Window).lightness() > 128:
+            self._gutter_pen = QPen(QColor("black"))
+        else:
+            self._gutter_pen = QPen(QColor("white"))
+        self._gutter_bg = self.palette().alternateBase().color()
+        self._digit_atlas = []  # re-rendered in the new colour on next paint
+        self._lineNumberArea.update()
+
+    def _buildDigitAtlas(self):
+        w, h = self._digit_w, self.fontMetrics().height()
+        dpr = self.devicePixelRatioF()
+        atlas = []
+        for digit in "0123456789":
+            pm = QPixmap(int(w * dpr), int(h * dpr))
+            pm.setDevicePixelRatio(dpr)
+            pm.fill(Qt.GlobalColor.transparent)
+            p = QPainter(pm)
+            p.setFont(self.font())
+            p.setPen(self._gutter_pen)
+            p.drawText(QRect(0, 0, w, h), Qt.AlignmentFlag.AlignLeft, digit)
+            p.end()
+            atlas.append(pm)
+        self._digit_atlas = atlas
+
     def lineNumberAreaPaintEvent(self, event):
+        if not self._digit_atlas:
+            self._buildDigitAtlas()
+        atlas = self._digit_atlas
+        digit_w = self._digit_w
+        right = self._lineNumberArea.width() - 6
+
         painter = QPainter(self._lineNumberArea)
-        bg = self.palette().alternateBase().color()
-        painter.fillRect(event.rect(), bg)
+        rect = event.rect()
+        painter.fillRect(rect, self._gutter_bg)
+
+        def draw_number(number: int, y: int):
+            # blit the pre-rendered digits, right-aligned (monospace: every digit is digit_w wide)
+            digits = str(number)
+            x = right - len(digits) * digit_w
+            for ch in digits:
+                painter.drawPixmap(x, y, atlas[ord(ch) - 48])
+                x += digit_w
 
         block = self.firstVisibleBlock()
         block_number = block.blockNumber()
         top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-        bottom = top + int(self.blockBoundingRect(block).height())
 
-        if QApplication.instance().palette().color(QPalette.Window).lightness() > 128:
-            painter.setPen(QColor("black"))
+        if self.lineWrapMode() == QPlainTextEdit.LineWrapMode.NoWrap:
+            if not self._line_h:
+                self._line_h = int(self.blockBoundingRect(block).height())
+            line_h = self._line_h
         else:
-            painter.setPen(QColor("white"))
-
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                painter.drawText(
-                    0,
-                    top,
-                    self._lineNumberArea.width() - 6,
-                    self.fontMetrics().height(),
-                    Qt.AlignmentFlag.AlignRight,
-                    number,
-                )
+            line_h = 0
+        if line_h > 0:
+            # Unwrapped: every block is one line of the same height, so the visible
+            # range follows from arithmetic instead of walking block.next()
+            first = block_number + max(0, (rect.top() - top) // line_h)
+            last = min(self.blockCount(), block_number + (rect.bottom() - top) // line_h + 1)
+            y = top + (first - block_number) * line_h
+            for n in range(first, last):
+                draw_number(n + 1, y)
+                y += line_h
+            return
+
+        bottom = top + int(self.blockBoundingRect(block).height())
+        while block.isValid() and top <= rect.bottom():
+            if block.isVisible() and bottom >= rect.top():
+                draw_number(block_number + 1, top)
             block = block.next()
             top = bottom
             bottom = top + int(self.blockBoundingRect(block).height())
             block_number += 1
 
     # --- niceties ---
+    def invalidateCurrentLine(self):
+        # force the next highlightCurrentLine() to rebuild the selection
+        self._hl_dirty = True
+
     def highlightCurrentLine(self):
+        block = self.textCursor().blockNumber()
+        if block == self._last_hl_block and not self._hl_dirty:
+            return
+        self._last_hl_block = block
+        self._hl_dirty = False
         if self.isReadOnly():
             # still highlight, but lighter
             selection = QTextEdit.ExtraSelection()
@@ -180,10 +364,56 @@ class CodeEditor(QPlainTextEdit):
 # ------------------------------
 # Simple Python syntax highlighter (extend as needed)
 # ------------------------------
+def word_alternation(words) -> str:
+    # Prefix-factor a word list into one regex ("as|assert|async" -> "as(?:sert|ync)?"):
+    # the engine walks it like a trie, testing each leading letter once instead of
+    # retrying every alternative at every position. Words must be plain identifiers.
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # a word ends here
+
+    def build(node: dict) -> str:
+        branches = [ch + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) > 1:
+            return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+        body = branches[0]
+        if not optional:
+            return body
+        return body + "?" if len(body) == 1 else f"(?:{body})?"
+
+    return build(trie)
+
+
 class PythonHighlighter(QSyntaxHighlighter):
-    def __init__(self, document):
+    MAX_BYTES = SYNTAX_MAX_BYTES
+    CACHE_SIZE = 4096  # distinct lines whose format spans we remember
+
+    # Compiled pattern + formats and the span cache only depend on the rules, so every
+    # highlighter (Work plus each previewed file) shares them; built by the first one
+    _compiled: tuple[QRegularExpression, tuple[QTextCharFormat, ...]] | None = None
+    # line text -> flat (start, length, format id, start, length, format id, ...),
+    # least recently used first; one int tuple per line instead of a tuple per span
+    _cache: OrderedDict[str, tuple[int, ...]] = OrderedDict()
+
+    def __init__(self, document, visible_range: tuple[int, int] | None = None):
         super().__init__(document)
-        self.rules = []
+        # Only blocks in this range are highlighted; the editor reports scrolling via setVisibleRange
+        self._visible_range = visible_range or (0, sys.maxsize)
+        # block count when the range was last applied; a change means blocks were shifted
+        self._block_count = document.blockCount() if document is not None else 0
+        if PythonHighlighter._compiled is None:
+            PythonHighlighter._compiled = self._compile()
+        self.pattern, self._fmts = PythonHighlighter._compiled
+
+    @staticmethod
+    def _compile() -> tuple[QRegularExpression, tuple[QTextCharFormat, ...]]:
+        rules = []
 
         def fmt(color: str, bold=False, italic=False):
             f = QTextCharFormat()
@@ -199,29 +429,81 @@ class PythonHighlighter(QSyntaxHighlighter):
             "and|as|assert|break|class|continue|def|del|elif|else|except|False|finally|for|from|global|if|import|in|is|"
             "lambda|None|nonlocal|not|or|pass|raise|return|True|try|while|with|yield"
         )
-        self.rules.append((QRegularExpression(rf"\b(?:{keywords})\b"), keyword_format))
+        rules.append(("kw", rf"\b{word_alternation(keywords.split('|'))}\b", keyword_format))
 
         builtin_format = fmt("#8a2be2")
         builtins = "len|range|print|dict|list|set|tuple|int|float|str|bool|type|isinstance|enumerate|zip|map|filter|open"
-        self.rules.append((QRegularExpression(rf"\b(?:{builtins})\b"), builtin_format))
+        rules.append(("bi", rf"\b{word_alternation(builtins.split('|'))}\b", builtin_format))
 
         number_format = fmt("#e879f9")
-        self.rules.append((QRegularExpression(r"\b[0-9]+(\.[0-9]+)?\b"), number_format))
+        rules.append(("num", r"\b[0-9]+(?:\.[0-9]+)?\b", number_format))
 
         string_format = fmt("#16a34a")
-        self.rules.append((QRegularExpression(r'\".*?\"'), string_format))
-        self.rules.append((QRegularExpression(r"\'.*?\''"), string_format))
-        self.rules.append((QRegularExpression(r"\'.*?\'"), string_format))
+        # single line, either quote, backslash escapes (\" or \') don't end the string
+        rules.append(("str", r'"(?:[^"\\\n]|\\.)*"|' + r"'(?:[^'\\\n]|\\.)*'", string_format))
 
         comment_format = fmt("#9aa0a6", italic=True)
-        self.rules.append((QRegularExpression(r"#.*"), comment_format))
+        rules.append(("cmt", r"#.*", comment_format))
+
+        # All rules in one pattern: each block is scanned once, and the group that
+        # matched tells us which format to use (format id == capture group index).
+        pattern = QRegularExpression("|".join(f"(?<{name}>{rx})" for name, rx, _ in rules))
+        assert pattern.isValid(), pattern.errorString()
+        pattern.optimize()  # JIT-compile now instead of on the first block
+        return pattern, (QTextCharFormat(),) + tuple(form for _, _, form in rules)
 
     def highlightBlock(self, text):
-        for regex, form in self.rules:
-            it = regex.globalMatch(text)
-            while it.hasNext():
-                m = it.next()
-                self.setFormat(m.capturedStart(), m.capturedLength(), form)
+        # Big documents: skip highlighting entirely, the regex passes would freeze the UI
+        if self.document().characterCount() > self.MAX_BYTES:
+            return
+        # Blank lines have nothing to colour; don't let them churn the cache either
+        if not text or text.isspace():
+            return
+        # Off-screen blocks are left plain until they scroll into view
+        first, last = self._visible_range
+        if not first <= self.currentBlock().blockNumber() <= last:
+            return
+        # Qt re-highlights blocks whose text didn't change (relayouts, neighbour edits);
+        # replay the spans we found last time instead of running the regex again.
+        cache = self._cache
+        spans = cache.get(text)
+        if spans is None:
+            # hot loop: bound methods hoisted into locals
+            found = []
+            add = found.extend
+            it = self.pattern.globalMatch(text)
+            has_next, next_match = it.hasNext, it.next
+            while has_next():
+                m = next_match()
+                add((m.capturedStart(), m.capturedLength(), m.lastCapturedIndex()))
+            spans = cache[text] = tuple(found)
+            if len(cache) > self.CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(text)
+        set_format, fmts = self.setFormat, self._fmts
+        fields = iter(spans)
+        for start, length, fid in zip(fields, fields, fields):
+            set_format(start, length, fmts[fid])
+
+    def setVisibleRange(self, first: int, last: int):
+        old_first, old_last = self._visible_range
+        self._visible_range = (first, last)
+        doc = self.document()
+        if doc is None:
+            return
+        if doc.blockCount() != self._block_count:
+            # lines were inserted/deleted, so never-highlighted blocks can have moved into the
+            # old range; redo all of it (blocks that were on screen replay from the cache)
+            self._block_count = doc.blockCount()
+            old_first, old_last = 1, 0
+        for n in range(first, last + 1):
+            if old_first <= n <= old_last:
+                continue  # already highlighted while it was on screen
+            block = doc.findBlockByNumber(n)
+            if not block.isValid():
+                break
+            self.rehighlightBlock(block)
 
 
 # ------------------------------
@@ -255,6 +537,146 @@ def apply_theme(app: QApplication, theme: str):
         app.setStyleSheet("")
 
 
+# ------------------------------
+# File helpers
+# ------------------------------
+def read_text_mapped(path: Path) -> str:
+    # Decode UTF-8 straight out of a memory map: no intermediate bytes copy of the file
+    qf = QFile(str(path))
+    if not qf.open(QIODevice.OpenModeFlag.ReadOnly):
+        raise OSError(qf.errorString())
+    try:
+        size = qf.size()
+        if size == 0:
+            return ""
+        mv = qf.map(0, size)
+        if mv is None:
+            raise OSError(qf.errorString())
+        try:
+            return str(mv, "utf-8")
+        finally:
+            qf.unmap(mv)
+    finally:
+        qf.close()
+
+
+def fsync_dir(path: Path):
+    # Makes a rename inside `path` durable. Windows can't open directories like this
+    # (and NTFS journals the rename), so it is a no-op there.
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def iter_text_mapped(path: Path, chunk_size: int):
+    # Like read_text_mapped, but yields the text in pieces decoded from successive slices of the map
+    qf = QFile(str(path))
+    if not qf.open(QIODevice.OpenModeFlag.ReadOnly):
+        raise OSError(qf.errorString())
+    try:
+        size = qf.size()
+        if size == 0:
+            return
+        mv = qf.map(0, size)
+        if mv is None:
+            raise OSError(qf.errorString())
+        try:
+            decoder = codecs.getincrementaldecoder("utf-8")()  # copes with characters split across slices
+            carry = ""
+            for pos in range(0, size, chunk_size):
+                final = pos + chunk_size >= size
+                # the decoder reports offsets into (bytes held back from the last slice + this slice)
+                base = pos - len(decoder.getstate()[0])
+                try:
+                    text = carry + decoder.decode(mv[pos:pos + chunk_size], final)
+                except UnicodeDecodeError as e:
+                    # report where the bad bytes sit in the file, like the small-file path does
+                    raise UnicodeDecodeError(e.encoding, e.object, base + e.start, base + e.end, e.reason) from None
+                carry = ""
+                if text.endswith("\r") and not final:
+                    # keep "\r\n" together: two separate inserts would make two line breaks
+                    text, carry = text[:-1], "\r"
+                if text:
+                    yield text
+        finally:
+            qf.unmap(mv)
+    finally:
+        qf.close()
+
+
+# ------------------------------
+# Background writes (save / snapshot)
+# ------------------------------
+class WriteSignals(QObject):
+    # kind ("save" or "snapshot"), path, error message ("" on success)
+    finished = Signal(str, str, str)
+
+
+class WriteJob(QRunnable):
+    # Writes one or more (path, text) items; finished is emitted once per item.
+    # Each file is written to a temp file next to its target and renamed over it, so a
+    # failed or interrupted write never leaves a half-written file behind. `durable` also
+    # fsyncs the file and its directory so the new contents survive a crash.
+    def __init__(self, kind: str, items: list[tuple[Path, str]], signals: WriteSignals, durable=True):
+        super().__init__()
+        self.kind = kind
+        self.items = items
+        self.signals = signals
+        self.durable = durable
+
+    def run(self):
+        for path, text in self.items:
+            try:
+                self._write(path.resolve(), text)  # through symlinks, not over them
+            except Exception as e:
+                self.signals.finished.emit(self.kind, str(path), str(e))
+                continue
+            self.signals.finished.emit(self.kind, str(path), "")
+
+    def _write(self, path: Path, text: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            st = None
+        if st is not None and not os.access(path, os.W_OK):
+            # renaming over it would succeed; don't let that bypass a read-only file
+            raise PermissionError(errno.EACCES, os.strerror(errno.EACCES), str(path))
+        # a rename would split the hard links or take the file over from its owner
+        in_place = st is not None and (st.st_nlink > 1 or (hasattr(os, "getuid") and st.st_uid != os.getuid()))
+        if not in_place:
+            try:
+                fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+            except PermissionError:
+                in_place = True  # the directory isn't writable, the file itself may still be
+        if in_place:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+                self._sync(f)
+            return
+        try:
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                self._sync(f)
+            # mkstemp creates the file 0600: keep the target's mode, or the usual one for a new file
+            os.chmod(tmp, st.st_mode & 0o7777 if st is not None else 0o666 & ~_UMASK)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        if self.durable:
+            fsync_dir(path.parent)
+
+    def _sync(self, f):
+        if self.durable:
+            f.flush()
+            os.fsync(f.fileno())  # data on disk before the rename can expose it
+
+
 # ------------------------------
 # Main window
 # ------------------------------
@@ -265,10 +687,36 @@ class MainWindow(QMainWindow):
         self.resize(1200, 750)
 
         self._work_path: Path | None = None
+        self._preview_load_id = 0  # bumped on every preview; stale chunked loads are dropped
+        # path -> ((mtime_ns, size), text), least recently used first
+        self._preview_cache: OrderedDict[str, tuple[tuple[int, int], str]] = OrderedDict()
+
+        # Saves/snapshots are written off the GUI thread; one worker keeps them in order
+        self._writer_pool = QThreadPool(self)
+        self._writer_pool.setMaxThreadCount(1)
+        self._writes = WriteSignals(self)
+        self._writes.finished.connect(self._on_write_finished)
+        self._save_failed = False
+        # At most one save is in flight; Ctrl+S while it runs only replaces the queued
+        # text, so a burst of saves writes the first and the latest, nothing in between
+        self._save_in_flight = False
+        self._pending_save: tuple[Path, str] | None = None
+        self._saved_path: Path | None = None  # where the unmodified document was last written
+        # Snapshots requested within one event-loop pass go out as a single job;
+        # same-second snapshots share a file name, so only the newest text is kept
+        self._pending_snapshots: dict[Path, str] = {}
+        self._snapshot_timer = QTimer(self)
+        self._snapshot_timer.setSingleShot(True)
+        self._snapshot_timer.setInterval(0)
+        self._snapshot_timer.timeout.connect(self._flush_snapshots)
 
         # --- Left: directory tree ---
         self.fs_model = QFileSystemModel(self)
         self.fs_model.setReadOnly(True)
+        # No symlink resolution: keeps big trees (e.g. a home dir) cheap. Change watching stays
+        # on (it only covers directories that have been listed) so saves, snapshots and files
+        # created outside the editor show up in the tree.
+        self.fs_model.setOption(QFileSystemModel.Option.DontResolveSymlinks, True)
         # show files and dirs; you can restrict with setNameFilters if you want only *.txt;*.py
         # self.fs_model.setNameFilters(["*.txt", "*.py", "*.md", "*.json"])
         # self.fs_model.setNameFilterDisables(False)
@@ -277,23 +725,28 @@ class MainWindow(QMainWindow):
         self.tree.setModel(self.fs_model)
         self.tree.setSelectionBehavior(QTreeView.SelectionBehavior.SelectRows)
         self.tree.setHeaderHidden(False)
+        # every row is one icon + one line of text: lets the view skip per-row size hints
+        self.tree.setUniformRowHeights(True)
         self.tree.doubleClicked.connect(self._maybe_preview)
 
         root = str(start_path or Path.cwd())
         root_index = self.fs_model.setRootPath(root)
         self.tree.setRootIndex(root_index)
-        # Tidy columns: Name, Size, Type, Date Modified
+        # Only the Name column is shown; Size, Type and Date Modified are hidden
         self.tree.setColumnWidth(0, 260)
-        for col, w in [(1, 90), (2, 120), (3, 160)]:
-            self.tree.setColumnWidth(col, w)
+        for col in (1, 2, 3):
+            self.tree.hideColumn(col)
 
         # --- Right: two editors (preview + work) ---
         self.preview_editor = CodeEditor()
         self.preview_editor.setReadOnly(True)
-        self.preview_highlighter = PythonHighlighter(self.preview_editor.document())
+        # attached per file in _maybe_preview (only for small Python files)
+        self.preview_highlighter: PythonHighlighter | None = None
 
         self.work_editor = CodeEditor()
-        self.work_highlighter = PythonHighlighter(self.work_editor.document())
+        self.work_highlighter = PythonHighlighter(self.work_editor.document(), self.work_editor.visibleBlockRange())
+        self.work_editor.visibleBlocksChanged.connect(self.work_highlighter.setVisibleRange)
+        self.preview_editor.visibleBlocksChanged.connect(self._preview_visible_blocks_changed)
 
         # Splitter for preview/work
         right_split = QSplitter(Qt.Orientation.Vertical)
@@ -367,10 +820,20 @@ class MainWindow(QMainWindow):
         self._cursor_label = QLabel("")
         self.status.addPermanentWidget(self._cursor_label)
 
-        self.preview_editor.cursorPositionChanged.connect(lambda: self._update_cursor_status(self.preview_editor))
-        self.work_editor.cursorPositionChanged.connect(lambda: self._update_cursor_status(self.work_editor))
+        # Cursor moves (e.g. holding an arrow key) update the label at most once per frame
+        self._cursor_widget: CodeEditor = self.work_editor
+        self._last_cursor_status: tuple[str, int, int] | None = None
+        self._cursor_timer = QTimer(self)
+        self._cursor_timer.setSingleShot(True)
+        self._cursor_timer.setInterval(16)
+        self._cursor_timer.timeout.connect(lambda: self._update_cursor_status(self._cursor_widget))
+        self.preview_editor.cursorPositionChanged.connect(lambda: self._queue_cursor_status(self.preview_editor))
+        self.work_editor.cursorPositionChanged.connect(lambda: self._queue_cursor_status(self.work_editor))
         self._update_cursor_status(self.work_editor)
 
+        # The "*" comes from Qt via the [*] title placeholder; the title itself only changes with the path
+        self.work_editor.document().modificationChanged.connect(self.setWindowModified)
+        self._last_title_key: str | None = None
         self._sync_titles()
 
     # ------------- Actions -------------
@@ -390,18 +853,71 @@ class MainWindow(QMainWindow):
             return
         try:
             # Attempt UTF-8 read; if it fails, show an error
-            text = file_path.read_text(encoding="utf-8")
+            st = file_path.stat()
+            text = None if st.st_size > PREVIEW_CHUNK_THRESHOLD else self._read_preview(file_path, st)
         except Exception as e:
-            QMessageBox.warning(self, "Preview failed", f"Could not preview file:\n{file_path}\n\n{e}")
+            self._preview_failed(file_path, e)
             return
-        self.preview_editor.setPlainText(text)
+        self._preview_load_id += 1
+        # Build the new document off-screen (no highlighter, no undo), then swap it in at once
+        doc = QTextDocument(self.preview_editor)
+        doc.setDocumentLayout(QPlainTextDocumentLayout(doc))
+        doc.setUndoRedoEnabled(False)
+        doc.setDefaultFont(self.preview_editor.font())
+        if text is None:
+            chunks = iter_text_mapped(file_path, PREVIEW_CHUNK_SIZE)
+            self._fill_preview(self._preview_load_id, file_path, doc, chunks)
+            return
+        doc.setPlainText(text)
+        self._show_preview(file_path, doc)
+
+    def _fill_preview(self, load_id: int, file_path: Path, doc: QTextDocument, chunks):
+        if load_id != self._preview_load_id:
+            chunks.close()  # another file was previewed meanwhile; unmap this one now
+            doc.deleteLater()
+            return
+        try:
+            chunk = next(chunks, None)
+        except Exception as e:
+            doc.deleteLater()
+            self._preview_failed(file_path, e)
+            return
+        if chunk is not None:
+            cursor = QTextCursor(doc)
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(chunk)
+            QTimer.singleShot(0, lambda: self._fill_preview(load_id, file_path, doc, chunks))
+            return
+        self._show_preview(file_path, doc)
+
+    def _preview_failed(self, file_path: Path, error: Exception):
+        QMessageBox.warning(self, "Preview failed", f"Could not preview file:\n{file_path}\n\n{error}")
+
+    def _show_preview(self, file_path: Path, doc: QTextDocument):
+        if self.preview_highlighter is not None:
+            self.preview_highlighter.setDocument(None)
+            self.preview_highlighter.deleteLater()
+            self.preview_highlighter = None
+        old_doc = self.preview_editor.document()
+        # the editor's initial document is deleted by setDocument itself; only ours need it
+        owned = old_doc.parent() is self.preview_editor
+        self.preview_editor.setDocument(doc)
+        if owned:
+            old_doc.deleteLater()
+        if file_path.suffix.lower() in PYTHON_SUFFIXES and doc.characterCount() < SYNTAX_MAX_BYTES:
+            self.preview_highlighter = PythonHighlighter(doc, self.preview_editor.visibleBlockRange())
         self.status.showMessage(f"Preview: {file_path}", 2000)
 
+    def _preview_visible_blocks_changed(self, first: int, last: int):
+        if self.preview_highlighter is not None:
+            self.preview_highlighter.setVisibleRange(first, last)
+
     def _copy_preview_to_work(self):
         self.work_editor.setPlainText(self.preview_editor.toPlainText())
         self.work_editor.document().setModified(True)
         # Reset work path so you don't accidentally overwrite something old
         self._work_path = None
+        self._saved_path = None
         self._sync_titles()
         self.status.showMessage("Copied preview to work area (unsaved)", 2000)
 
@@ -411,21 +927,29 @@ class MainWindow(QMainWindow):
         self.work_editor.clear()
         self.work_editor.document().setModified(False)
         self._work_path = None
+        self._saved_path = None
         self._sync_titles()
 
     def _save_work(self) -> bool:
         if self._work_path is None:
             return self._save_work_as()
-        try:
-            self._work_path.write_text(self.work_editor.toPlainText(), encoding="utf-8")
-        except Exception as e:
-            QMessageBox.critical(self, "Save failed", f"Could not save file:\n{e}")
-            return False
+        if not self.work_editor.document().isModified() and self._work_path == self._saved_path:
+            return True  # nothing changed since the last save; don't rewrite the file
+        self._saved_path = self._work_path
+        item = (self._work_path, self.work_editor.toPlainText())
+        if self._save_in_flight:
+            self._pending_save = item
+        else:
+            self._start_save(item)
+        # Optimistic: _on_write_finished marks the document modified again if the write fails
         self.work_editor.document().setModified(False)
-        self.status.showMessage(f"Saved: {self._work_path}", 1500)
         self._sync_titles()
         return True
 
+    def _start_save(self, item: tuple[Path, str]):
+        self._save_in_flight = True
+        self._writer_pool.start(WriteJob("save", [item], self._writes))
+
     def _save_work_as(self) -> bool:
         path, _ = QFileDialog.getSaveFileName(
             self,
@@ -443,19 +967,43 @@ class MainWindow(QMainWindow):
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         if self._work_path is not None:
             base_dir = self._work_path.parent / ".history"
-            base_dir.mkdir(parents=True, exist_ok=True)
             fname = f"{self._work_path.stem}-{timestamp}{self._work_path.suffix}"
             snap_path = base_dir / fname
         else:
             base_dir = Path.cwd() / "snapshots"
-            base_dir.mkdir(parents=True, exist_ok=True)
             snap_path = base_dir / f"unsaved-{timestamp}.txt"
-        try:
-            snap_path.write_text(text, encoding="utf-8")
-        except Exception as e:
-            QMessageBox.critical(self, "Snapshot failed", f"Could not write snapshot:\n{e}")
+        self._pending_snapshots[snap_path] = text
+        self._snapshot_timer.start()
+
+    def _flush_snapshots(self):
+        if not self._pending_snapshots:
+            return
+        items = list(self._pending_snapshots.items())
+        self._pending_snapshots.clear()
+        # snapshots are extra copies in fresh files, not worth an fsync each; saves are
+        self._writer_pool.start(WriteJob("snapshot", items, self._writes, durable=False))
+
+    def _on_write_finished(self, kind: str, path: str, error: str):
+        if kind == "save":
+            self._save_in_flight = False
+            if error:
+                # the queued text would most likely fail the same way; the document stays modified
+                self._pending_save = None
+                self._save_failed = True
+                self.work_editor.document().setModified(True)
+                self._sync_titles()
+                QMessageBox.critical(self, "Save failed", f"Could not save file:\n{error}")
+                return
+            if self._pending_save is not None:
+                item, self._pending_save = self._pending_save, None
+                self._start_save(item)
+                return
+            self.status.showMessage(f"Saved: {path}", 1500)
+            return
+        if error:
+            QMessageBox.critical(self, "Snapshot failed", f"Could not write snapshot:\n{error}")
             return
-        self.status.showMessage(f"Snapshot saved: {snap_path}", 2000)
+        self.status.showMessage(f"Snapshot saved: {path}", 2000)
 
     def _toggle_wrap(self, checked: bool):
         mode = QPlainTextEdit.LineWrapMode.WidgetWidth if checked else QPlainTextEdit.LineWrapMode.NoWrap
@@ -465,11 +1013,29 @@ class MainWindow(QMainWindow):
     def _toggle_theme(self, checked: bool):
         app = QApplication.instance()
         apply_theme(app, Theme.DARK if checked else Theme.LIGHT)
-        # refresh highlight backgrounds
+        # refresh highlight backgrounds and gutter colours
+        self.preview_editor.invalidateCurrentLine()
+        self.work_editor.invalidateCurrentLine()
         self.preview_editor.highlightCurrentLine()
         self.work_editor.highlightCurrentLine()
+        self.preview_editor.refreshGutterColors()
+        self.work_editor.refreshGutterColors()
 
     # ------------- Helpers -------------
+    def _read_preview(self, file_path: Path, st: os.stat_result) -> str:
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = str(file_path)
+        hit = self._preview_cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            self._preview_cache.move_to_end(key)
+            return hit[1]
+        text = read_text_mapped(file_path)
+        # only small files get here (big ones are streamed), so caching them stays cheap
+        self._preview_cache[key] = (stamp, text)
+        if len(self._preview_cache) > PREVIEW_CACHE_SIZE:
+            self._preview_cache.popitem(last=False)
+        return text
+
     def _ask_to_save_work_if_dirty(self) -> bool:
         if not self.work_editor.document().isModified():
             return True
@@ -482,25 +1048,50 @@ class MainWindow(QMainWindow):
             | QMessageBox.StandardButton.Cancel,
         )
         if btn == QMessageBox.StandardButton.Save:
-            return self._save_work()
+            # wait for the write: callers go on to clear or close the Work document
+            return self._save_work() and self._finish_writes()
         if btn == QMessageBox.StandardButton.Discard:
             return True
         return False
 
     def _sync_titles(self):
+        key = str(self._work_path or "")
+        if key == self._last_title_key:
+            return
+        self._last_title_key = key
         work_name = self._work_path.name if self._work_path else "(unsaved)"
-        mod_mark = "*" if self.work_editor.document().isModified() else ""
-        self.setWindowTitle(f"Two-Pane Editor — Work: {work_name}{mod_mark}")
+        self.setWindowTitle(f"Two-Pane Editor — Work: {work_name}[*]")
+        self.setWindowFilePath(key)
 
     def _update_cursor_status(self, which: CodeEditor):
         c = which.textCursor()
         line = c.blockNumber() + 1
         col = c.positionInBlock() + 1
         role = "Work" if which is self.work_editor else "Preview"
+        if (role, line, col) == self._last_cursor_status:
+            return
+        self._last_cursor_status = (role, line, col)
         self._cursor_label.setText(f"{role} Ln {line}, Col {col}")
 
+    def _queue_cursor_status(self, which: CodeEditor):
+        self._cursor_widget = which
+        if not self._cursor_timer.isActive():
+            self._cursor_timer.start()
+
+    def _finish_writes(self) -> bool:
+        # Block until queued writes are on disk; False if a save failed along the way
+        self._save_failed = False
+        self._snapshot_timer.stop()
+        self._flush_snapshots()
+        while True:
+            self._writer_pool.waitForDone()
+            QApplication.sendPostedEvents()  # deliver the pending finished() signals now
+            if not self._save_in_flight:  # a queued save may have just been started
+                break
+        return not self._save_failed
+
     def closeEvent(self, event):
-        if self._ask_to_save_work_if_dirty():
+        if self._ask_to_save_work_if_dirty() and self._finish_writes():
             event.accept()
         else:
             event.ignore()